@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Auto Save Daemon - Headless Monitor with Status IPC
+
+Runs AutoSaveMonitor in the background and answers status/control requests
+over a Unix socket (see ipc.py for the protocol). Status, recent backups and
+events are served from memory, so clients never rescan backup_dir or fork
+pgrep themselves.
+"""
+
+import json
+import os
+import socketserver
+import threading
+from collections import deque
+from datetime import datetime
+
+from monitor_core import AutoSaveMonitor
+import ipc
+
+
+# AutoSaveMonitor settings a client may change through the "configure" command,
+# with the type each one must have
+CONFIG_KEYS = {
+    "process_name": str, "save_file_name": str, "save_file_path": str, "backup_dir": str,
+    "max_backups": int, "check_interval": int, "backup_mode": str,
+    "min_check_interval": int, "max_check_interval": int,
+    "adaptive_interval": bool, "replica_dir": str, "pack_snapshots": bool,
+}
+
+
+def validate_settings(settings: dict) -> dict:
+    """Check and convert client-supplied settings; raises ValueError on bad input."""
+    if not isinstance(settings, dict):
+        raise ValueError("settings must be an object")
+    unknown = set(settings) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+    
+    validated = {}
+    for key, value in settings.items():
+        expected = CONFIG_KEYS[key]
+        if value is None:
+            # None restores the monitor default
+            validated[key] = None
+        elif expected is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"{key} must be true or false")
+            validated[key] = value
+        elif expected is int:
+            if isinstance(value, bool):
+                raise ValueError(f"{key} must be a positive integer")
+            try:
+                number = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a positive integer")
+            if number < 1:
+                raise ValueError(f"{key} must be a positive integer")
+            validated[key] = number
+        else:
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"{key} must be a non-empty string")
+            validated[key] = value
+    
+    if validated.get("backup_mode") not in (None, "file", "folder"):
+        raise ValueError("backup_mode must be 'file' or 'folder'")
+    return validated
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request line and writes one JSON reply line."""
+    
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            message = json.loads(line.decode())
+            reply = self.server.daemon.handle_command(message)
+        except ValueError as e:
+            reply = {"ok": False, "error": f"Invalid request: {e}"}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AutoSaveDaemon:
+    """Long-running monitor that keeps its caches warm and serves clients."""
+    
+    def __init__(self, socket_path=ipc.DEFAULT_SOCKET_PATH, max_events=200,
+                 log_callback=None, **monitor_settings):
+        self.socket_path = socket_path
+        self.log_callback = log_callback
+        self.settings = {k: v for k, v in validate_settings(monitor_settings).items()
+                         if v is not None}
+        
+        # Recent events, each {"id", "time", "message"}
+        self.events = deque(maxlen=max_events)
+        self.next_event_id = 1
+        self.lock = threading.Lock()
+        # Serializes start/stop/configure, which arrive on concurrent handler threads
+        self.control_lock = threading.Lock()
+        
+        # Backup listing cache, refreshed only when the monitor reports changes
+        self._backups_version = None
+        self._recent_backups = []
+        self._backup_count = 0
+        
+        self.monitor = self._create_monitor()
+        self.monitor_thread = None
+        self.server = None
+        self._shutdown_event = threading.Event()
+    
+    def _create_monitor(self, settings=None) -> AutoSaveMonitor:
+        settings = self.settings if settings is None else settings
+        monitor = AutoSaveMonitor(log_callback=self.log, **settings)
+        self._backups_version = None
+        return monitor
+    
+    def log(self, message: str):
+        """Record an event for clients and forward it to the log callback."""
+        with self.lock:
+            self.events.append({
+                "id": self.next_event_id,
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "message": message,
+            })
+            self.next_event_id += 1
+        if self.log_callback is not None:
+            self.log_callback(message)
+    
+    def _refresh_backups(self):
+        """Rescan backup_dir only if snapshots were added or removed since last time."""
+        monitor = self.monitor
+        version = monitor.backups_version
+        if self._backups_version == version:
+            return
+        
+        # Scan without holding the lock so event logging and other clients never wait on disk
+        recent = [
+            {"timestamp": b["timestamp"], "path": str(b["path"]), "size": b["size"]}
+            for b in monitor.get_recent_backups(limit=10)
+        ]
+        count = monitor.get_backup_count()
+        with self.lock:
+            self._recent_backups = recent
+            self._backup_count = count
+            self._backups_version = version
+    
+    def is_monitoring(self) -> bool:
+        return self.monitor_thread is not None and self.monitor_thread.is_alive()
+    
+    def start_monitoring(self):
+        """Start the monitor loop in a background thread."""
+        if self.is_monitoring():
+            return
+        self.monitor_thread = threading.Thread(target=self.monitor.start, daemon=True)
+        self.monitor_thread.start()
+        self.log("Monitoring started")
+    
+    def stop_monitoring(self):
+        """Stop the monitor loop and wait for it to exit."""
+        if not self.is_monitoring():
+            return
+        self.monitor.stop()
+        self.monitor_thread.join(timeout=15)
+        self.monitor_thread = None
+        self.log("Monitoring stopped")
+    
+    def configure(self, settings: dict):
+        """Replace monitor settings, restarting the loop if it was running."""
+        new_settings = dict(self.settings)
+        new_settings.update(validate_settings(settings))
+        new_settings = {k: v for k, v in new_settings.items() if v is not None}
+        
+        # Build the new monitor first so a failure leaves the old one untouched
+        monitor = self._create_monitor(new_settings)
+        
+        was_running = self.is_monitoring()
+        self.stop_monitoring()
+        self.settings = new_settings
+        self.monitor = monitor
+        self.log("Settings applied")
+        if was_running:
+            self.start_monitoring()
+    
+    def get_settings(self) -> dict:
+        monitor = self.monitor
+        return {
+            "process_name": monitor.process_name,
+            "save_file_path": str(monitor.save_file_path),
+            "backup_dir": str(monitor.backup_dir),
+            "max_backups": monitor.max_backups,
+            "check_interval": monitor.check_interval,
+            "min_check_interval": monitor.min_check_interval,
+            "max_check_interval": monitor.max_check_interval,
+            "replica_dir": str(monitor.replicator.target_dir) if monitor.replicator else None,
+            "pack_snapshots": monitor.pack_snapshots,
+        }
+    
+    def get_status(self) -> dict:
+        """Snapshot of the daemon state, served entirely from memory."""
+        self._refresh_backups()
+        with self.lock:
+            recent = list(self._recent_backups)
+            count = self._backup_count
+            last_event_id = self.next_event_id - 1
+        return {
+            "monitoring": self.is_monitoring(),
+            "game_running": self.monitor.game_detected,
+            "backup_count": count,
+            "max_backups": self.monitor.max_backups,
+            "last_backup": recent[0]["timestamp"] if recent else None,
+            "current_interval": self.monitor.current_interval,
+            "recent_backups": recent,
+            "last_event_id": last_event_id,
+            "settings": self.get_settings(),
+        }
+    
+    def get_events(self, since: int = 0) -> list:
+        with self.lock:
+            return [e for e in self.events if e["id"] > since]
+    
+    def handle_command(self, message: dict) -> dict:
+        """Dispatch one client request and build its reply."""
+        cmd = message.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "status":
+            return dict(self.get_status(), ok=True)
+        if cmd == "backups":
+            self._refresh_backups()
+            limit = int(message.get("limit", 10))
+            with self.lock:
+                return {"ok": True, "backups": self._recent_backups[:limit]}
+        if cmd == "events":
+            return {"ok": True, "events": self.get_events(int(message.get("since", 0)))}
+        if cmd == "start":
+            with self.control_lock:
+                self.start_monitoring()
+            return {"ok": True}
+        if cmd == "stop":
+            with self.control_lock:
+                self.stop_monitoring()
+            return {"ok": True}
+        if cmd == "configure":
+            try:
+                with self.control_lock:
+                    self.configure(message.get("settings", {}))
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+            return {"ok": True}
+        if cmd == "shutdown":
+            self.request_shutdown()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command: {cmd}"}
+    
+    def _bind(self):
+        """Bind the control socket, replacing a stale socket file if no daemon owns it."""
+        socket_dir = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        if not ipc.is_private_dir(socket_dir):
+            raise RuntimeError(f"Socket folder {socket_dir} must be owned by you and "
+                               f"not writable by others")
+        
+        if os.path.exists(self.socket_path):
+            if ipc.is_daemon_running(self.socket_path):
+                raise RuntimeError(f"Another daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        
+        # Restrictive umask so the socket is never reachable by others, even briefly
+        old_umask = os.umask(0o077)
+        try:
+            self.server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self.server.daemon = self
+    
+    def request_shutdown(self):
+        """Ask serve_forever to return; safe to call from signal handlers."""
+        self._shutdown_event.set()
+    
+    def serve_forever(self, start_monitoring=True):
+        """Serve clients until request_shutdown is called, then clean up."""
+        self._bind()
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.log(f"Listening on {self.socket_path}")
+        
+        if start_monitoring:
+            with self.control_lock:
+                self.start_monitoring()
+        
+        try:
+            # Short waits keep the main thread responsive to signals
+            while not self._shutdown_event.wait(1):
+                pass
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            with self.control_lock:
+                self.stop_monitoring()
+            if self.monitor.replicator is not None:
+                # Give snapshots still queued a chance to reach the replica before exit
+                self.monitor.replicator.join(timeout=10)
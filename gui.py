@@ -3,15 +3,20 @@
 Auto Save Monitor - GUI Interface
 
 Light-themed tkinter GUI for monitoring game save files and creating backups.
+
+If an Auto Save daemon (main.py run) is listening, the GUI attaches to it as a
+thin client and shows its status, backups and events. Otherwise it runs its
+own in-process monitor, imported only when first needed.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
+import queue
 import time
 from datetime import datetime
 from pathlib import Path
-from monitor_core import AutoSaveMonitor
+import ipc
 
 
 class AutoSaveGUI:
@@ -31,8 +36,12 @@ class AutoSaveGUI:
         self.process_name = tk.StringVar(value="Silksong")
         self.original_path = tk.StringVar(value="/Users/dingzhong/Library/Application Support/unity.Team-Cherry.Silksong/1018808405/user1.dat")
         self.backup_path = tk.StringVar(value="./backups")
+        self.replica_path = tk.StringVar(value="")
         self.check_interval = tk.StringVar(value="60")
+        self.min_check_interval = tk.StringVar(value="5")
+        self.max_check_interval = tk.StringVar(value="300")
         self.max_backups = tk.StringVar(value="100")
+        self.pack_snapshots = tk.BooleanVar(value=False)
         
         # Status variables
         self.game_status = tk.StringVar(value="Not Running")
@@ -42,9 +51,22 @@ class AutoSaveGUI:
         # Initialize monitor state
         self.monitor_thread = None
         
+        # Daemon attachment state. All IPC runs on background threads, which hand
+        # results to the Tk thread through ipc_results.
+        self.daemon_attached = False
+        self.daemon_status = None
+        self.ipc_results = queue.Queue()
+        
+        # Local backup listing cache, keyed on the monitor's backups_version
+        self.backups_version = None
+        self.recent_backups = []
+        self.cached_backup_count = 0
+        
         self.setup_ui()
         
-        # Start status update loop
+        # Start daemon polling and status update loops
+        threading.Thread(target=self.daemon_poll_loop, daemon=True).start()
+        self.process_ipc_results()
         self.update_status()
     
     def setup_ui(self):
@@ -183,6 +205,18 @@ class AutoSaveGUI:
                                           command=self.browse_backup_path, width=10)
         backup_browse_button.pack(side=tk.LEFT)
         
+        # Replica path (optional secondary folder, e.g. second disk or NAS)
+        ttk.Label(path_frame, text="Replica Path:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        replica_entry_frame = ttk.Frame(path_frame)
+        replica_entry_frame.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        self.replica_path_entry = ttk.Entry(replica_entry_frame, textvariable=self.replica_path, width=40)
+        self.replica_path_entry.pack(side=tk.LEFT, padx=(0, 5))
+        
+        replica_browse_button = ttk.Button(replica_entry_frame, text="Browse...", 
+                                           command=self.browse_replica_path, width=10)
+        replica_browse_button.pack(side=tk.LEFT)
+        
         # Backup settings
         backup_frame = ttk.LabelFrame(settings_frame, text="Backup Settings", padding="10")
         backup_frame.pack(fill=tk.X, pady=(0, 15))
@@ -191,10 +225,22 @@ class AutoSaveGUI:
         ttk.Entry(backup_frame, textvariable=self.check_interval, width=20).grid(
             row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
-        ttk.Label(backup_frame, text="Max Backups:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        ttk.Entry(backup_frame, textvariable=self.max_backups, width=20).grid(
+        ttk.Label(backup_frame, text="Min Interval (s):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(backup_frame, textvariable=self.min_check_interval, width=20).grid(
             row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
+        ttk.Label(backup_frame, text="Max Interval (s):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(backup_frame, textvariable=self.max_check_interval, width=20).grid(
+            row=2, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(backup_frame, text="Max Backups:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(backup_frame, textvariable=self.max_backups, width=20).grid(
+            row=3, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Checkbutton(backup_frame, text="Pack folder snapshots into single files",
+                        variable=self.pack_snapshots).grid(
+            row=4, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
         # Apply button
         button_frame = ttk.Frame(settings_frame)
         button_frame.pack(fill=tk.X, pady=(10, 0))
@@ -202,14 +248,78 @@ class AutoSaveGUI:
         apply_button = ttk.Button(button_frame, text="Apply Settings", command=self.apply_settings)
         apply_button.pack()
     
+    def run_ipc(self, cmd, on_reply=None, timeout=60, **params):
+        """Send a daemon command on a background thread; on_reply runs on the Tk thread."""
+        def worker():
+            reply = ipc.request(cmd, timeout=timeout, **params)
+            self.ipc_results.put(("reply", on_reply, reply))
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def daemon_poll_loop(self):
+        """Poll daemon status and new events once a second (background thread)."""
+        failures = 0
+        event_id = None
+        while True:
+            status = ipc.request("status", timeout=5)
+            if status and status.get('ok'):
+                failures = 0
+                events = []
+                if event_id is None:
+                    # Only show events that happen after attaching
+                    event_id = status['last_event_id']
+                elif status['last_event_id'] > event_id:
+                    reply = ipc.request("events", since=event_id, timeout=5)
+                    events = (reply or {}).get('events', [])
+                    if events:
+                        event_id = events[-1]['id']
+                self.ipc_results.put(("status", status, events))
+            else:
+                # A few misses in a row before detaching, so one slow reply does not flap
+                failures += 1
+                if failures == 3:
+                    event_id = None
+                    self.ipc_results.put(("status", None, []))
+            time.sleep(1)
+    
+    def process_ipc_results(self):
+        """Apply results from IPC threads on the Tk thread."""
+        while True:
+            try:
+                kind, first, second = self.ipc_results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "status":
+                self.daemon_status = first
+                for event in second:
+                    self.log_message(f"[daemon] {event['message']}")
+            elif first is not None:
+                first(second)
+        
+        self.root.after(100, self.process_ipc_results)
+    
+    def check_reply(self, reply, action):
+        """Log a failed daemon reply; returns True if the command succeeded."""
+        if reply is None:
+            self.log_message(f"{action}: no reply from daemon")
+            return False
+        if not reply.get('ok'):
+            self.log_message(f"{action} failed: {reply.get('error')}")
+            return False
+        return True
+    
     def start_monitoring(self):
         """Start the monitoring loop."""
+        if self.daemon_attached:
+            # The daemon keeps its own settings; only Apply Settings changes them
+            self.run_ipc("start", on_reply=lambda r: self.check_reply(r, "Start"))
+            return
+        
         if self.monitoring_active:
             messagebox.showinfo("Already Running", "Monitor is already running.")
             return
         
         # Apply settings before starting
-        self.apply_settings()
+        self.apply_settings(notify=False)
         
         if self.monitor is None:
             messagebox.showerror("Error", "Monitor not initialized. Please check your settings.")
@@ -244,12 +354,15 @@ class AutoSaveGUI:
     def monitoring_loop(self):
         """Run the monitoring loop in background thread."""
         self.log_message("Monitoring started")
+        self.monitor.start_replication()
         
         game_was_running = False
         
         while self.monitoring_active and self.monitor is not None:
             try:
                 is_running = self.monitor.is_game_running()
+                self.monitor.game_detected = is_running
+                backup_result = False
                 
                 # Only log when game state changes
                 if is_running and not game_was_running:
@@ -279,11 +392,11 @@ class AutoSaveGUI:
                                 self.log_message("No changes detected, skipping backup")
                                 game_was_running = False  # Prevent repeated "no changes" messages
                 
-                # Sleep for the check interval
-                time.sleep(self.monitor.check_interval)
+                # Sleep for the adaptive interval (wakes early on stop)
+                self.monitor.wait(self.monitor.next_check_interval(is_running, backup_result))
             except Exception as e:
                 self.log_message(f"Error: {str(e)}")
-                time.sleep(self.monitor.check_interval)
+                self.monitor.wait(self.monitor.check_interval)
         
         if game_was_running:
             self.log_message(f"✗ Game stopped: {self.monitor.process_name}")
@@ -292,6 +405,13 @@ class AutoSaveGUI:
     
     def stop_monitoring(self):
         """Stop the monitoring loop."""
+        if self.daemon_attached:
+            self.run_ipc("stop", on_reply=lambda r: self.check_reply(r, "Stop"))
+            return
+        self.stop_local_monitoring()
+    
+    def stop_local_monitoring(self):
+        """Stop the in-process monitoring loop."""
         self.monitoring_active = False
         if self.monitor is not None:
             self.monitor.stop()
@@ -322,8 +442,25 @@ class AutoSaveGUI:
         if path:
             self.backup_path.set(path)
     
-    def apply_settings(self):
-        """Apply settings and create monitor instance."""
+    def browse_replica_path(self):
+        """Browse for replica path (folder only)."""
+        path = filedialog.askdirectory(title="Select Replica Folder")
+        if path:
+            self.replica_path.set(path)
+    
+    @staticmethod
+    def get_positive_int(variable, label):
+        """Read a whole-number setting, rejecting zero and negatives like the daemon does."""
+        try:
+            value = int(variable.get())
+        except ValueError:
+            value = 0
+        if value < 1:
+            raise ValueError(f"{label} must be a positive integer")
+        return value
+    
+    def apply_settings(self, notify=True):
+        """Apply settings to the daemon, or create a local monitor instance."""
         try:
             # Stop existing monitor if running
             was_running = self.monitoring_active
@@ -350,25 +487,44 @@ class AutoSaveGUI:
                 save_file_path = self.original_path.get()
                 backup_mode = "file"
             
-            # Create new monitor with settings
-            self.monitor = AutoSaveMonitor(
+            settings = dict(
                 process_name=self.process_name.get(),
                 save_file_name=save_file_name,
                 save_file_path=save_file_path,
                 backup_dir=str(backup_path),
-                max_backups=int(self.max_backups.get()),
-                check_interval=int(self.check_interval.get()),
-                backup_mode=backup_mode
+                max_backups=self.get_positive_int(self.max_backups, "Max Backups"),
+                check_interval=self.get_positive_int(self.check_interval, "Check Interval"),
+                backup_mode=backup_mode,
+                min_check_interval=self.get_positive_int(self.min_check_interval, "Min Interval"),
+                max_check_interval=self.get_positive_int(self.max_check_interval, "Max Interval"),
+                replica_dir=self.replica_path.get().strip() or None,
+                pack_snapshots=self.pack_snapshots.get()
             )
             
+            if self.daemon_attached:
+                # The daemon restarts its own loop if it was running
+                self.run_ipc("configure", on_reply=lambda r: self.check_reply(r, "Apply settings"),
+                             settings=settings)
+                self.log_message("Settings sent to daemon")
+                return
+            else:
+                # Deferred so attaching to a daemon never loads the monitoring stack
+                from monitor_core import AutoSaveMonitor
+                
+                # Create new monitor with settings
+                self.monitor = AutoSaveMonitor(log_callback=self.log_message, **settings)
+                self.backups_version = None
+            
             self.log_message(f"Settings applied - Process: {self.process_name.get()}")
             self.log_message(f"Original path: {save_file_path}")
             self.log_message(f"Backup path: {backup_path}")
+            if settings["replica_dir"]:
+                self.log_message(f"Replica path: {settings['replica_dir']}")
             
             # If it was running, restart it
             if was_running:
                 self.start_monitoring()
-            else:
+            elif notify:
                 messagebox.showinfo("Settings Applied", "Settings have been applied successfully.")
         except ValueError as e:
             self.log_message(f"Error applying settings: {str(e)}")
@@ -377,18 +533,12 @@ class AutoSaveGUI:
             self.log_message(f"Error applying settings: {str(e)}")
             messagebox.showerror("Error", f"Failed to apply settings: {e}")
     
-    def update_backups_list(self):
+    def update_backups_list(self, recent_backups):
         """Update the recent backups list."""
-        if self.monitor is None:
-            return
-        
         # Clear existing items
         for item in self.backups_tree.get_children():
             self.backups_tree.delete(item)
         
-        # Get recent backups
-        recent_backups = self.monitor.get_recent_backups(limit=10)
-        
         for backup in recent_backups:
             # Format timestamp
             timestamp = backup['timestamp'].replace('_', ' ')
@@ -407,29 +557,81 @@ class AutoSaveGUI:
             self.backups_tree.insert("", tk.END, text=backup['timestamp'], 
                                     values=(timestamp, size_str))
             
-            # Update last backup
-            if len(recent_backups) > 0:
-                self.last_backup.set(timestamp)
+        # Update last backup (newest first)
+        if len(recent_backups) > 0:
+            self.last_backup.set(recent_backups[0]['timestamp'].replace('_', ' ').replace('-', ':'))
+    
+    def set_game_status(self, is_running):
+        """Update the game status indicator."""
+        if is_running:
+            self.game_status.set("Running")
+            self.status_indicator.config(foreground="green")
+        else:
+            self.game_status.set("Not Running")
+            self.status_indicator.config(foreground="red")
+    
+    def set_buttons(self, active):
+        """Enable Start or Stop depending on whether monitoring is active."""
+        self.start_button.config(state=tk.DISABLED if active else tk.NORMAL)
+        self.stop_button.config(state=tk.NORMAL if active else tk.DISABLED)
+    
+    def load_daemon_settings(self, settings):
+        """Fill the settings form from the daemon, so Apply starts from what it runs."""
+        self.process_name.set(settings['process_name'])
+        self.original_path.set(settings['save_file_path'])
+        self.backup_path.set(settings['backup_dir'])
+        self.replica_path.set(settings['replica_dir'] or "")
+        self.check_interval.set(str(settings['check_interval']))
+        self.min_check_interval.set(str(settings['min_check_interval']))
+        self.max_check_interval.set(str(settings['max_check_interval']))
+        self.max_backups.set(str(settings['max_backups']))
+        self.pack_snapshots.set(settings['pack_snapshots'])
+    
+    def update_daemon_status(self, status):
+        """Show status, backups and new events served by the daemon."""
+        self.set_game_status(status['game_running'])
+        self.backup_count.set(f"{status['backup_count']} / {status['max_backups']}")
+        self.update_backups_list(status['recent_backups'])
+        self.set_buttons(status['monitoring'])
+        
+    
+    def update_local_status(self):
+        """Show status of the in-process monitor without forking pgrep or rescanning."""
+        # Game state is tracked by the monitoring loop itself
+        self.set_game_status(self.monitoring_active and self.monitor.game_detected)
+        
+        # Only rescan backup_dir after the monitor added or removed snapshots
+        if self.backups_version != self.monitor.backups_version:
+            self.backups_version = self.monitor.backups_version
+            self.recent_backups = self.monitor.get_recent_backups(limit=10)
+            self.cached_backup_count = self.monitor.get_backup_count()
+            self.update_backups_list(self.recent_backups)
+        
+        max_bk = self.max_backups.get()
+        self.backup_count.set(f"{self.cached_backup_count} / {max_bk}")
     
     def update_status(self):
-        """Update the status display."""
-        if self.monitor is not None:
-            # Update game status
-            is_running = self.monitor.is_game_running()
-            if is_running:
-                self.game_status.set("Running")
-                self.status_indicator.config(foreground="green")
+        """Update the status display from the latest polled daemon status."""
+        status = self.daemon_status
+        attached = status is not None
+        
+        if attached != self.daemon_attached:
+            self.daemon_attached = attached
+            if attached:
+                self.log_message(f"Attached to daemon at {ipc.DEFAULT_SOCKET_PATH}")
+                self.load_daemon_settings(status['settings'])
+                if self.monitoring_active:
+                    # Never let two monitors write to the same backups
+                    self.stop_local_monitoring()
+                    self.log_message("Local monitor stopped; the daemon now handles backups")
             else:
-                self.game_status.set("Not Running")
-                self.status_indicator.config(foreground="red")
-            
-            # Update backup count
-            count = self.monitor.get_backup_count()
-            max_bk = self.max_backups.get()
-            self.backup_count.set(f"{count} / {max_bk}")
-            
-            # Update recent backups
-            self.update_backups_list()
+                self.log_message("Daemon not reachable, using local monitor")
+                self.set_buttons(self.monitoring_active)
+        
+        if attached:
+            self.update_daemon_status(status)
+        elif self.monitor is not None:
+            self.update_local_status()
         
         # Schedule next update
         self.root.after(1000, self.update_status)
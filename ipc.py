@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Auto Save IPC - Lightweight Daemon Client
+
+Talks to a running Auto Save daemon over a Unix socket. Kept to the standard
+library essentials so the CLI and GUI can import it without any start-up cost.
+
+Protocol: the client sends one JSON object per line, e.g. {"cmd": "status"},
+and the daemon answers with one JSON object per line: {"ok": true, ...} or
+{"ok": false, "error": "..."}.
+"""
+
+import json
+import os
+import socket
+from typing import Optional
+
+
+def _default_socket_path() -> str:
+    """Per-user socket path: $AUTOSAVER_SOCKET, $XDG_RUNTIME_DIR, or a private /tmp folder."""
+    if os.environ.get("AUTOSAVER_SOCKET"):
+        return os.environ["AUTOSAVER_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "autosaver.sock")
+    # The daemon creates this folder with mode 0700
+    return f"/tmp/autosaver-{os.getuid()}/daemon.sock"
+
+
+DEFAULT_SOCKET_PATH = _default_socket_path()
+
+
+def is_private_dir(path: str) -> bool:
+    """Check that a folder belongs to us and nobody else can write to it."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def request(cmd: str, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 2.0,
+            **params) -> Optional[dict]:
+    """Send one command to the daemon; returns its reply, or None if no daemon answers."""
+    message = dict(params, cmd=cmd)
+    # Another user could have planted a socket in a shared folder
+    if not is_private_dir(os.path.dirname(os.path.abspath(socket_path))):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(message).encode() + b"\n")
+            
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data.decode()) if data else None
+    except (OSError, ValueError):
+        return None
+
+
+def is_daemon_running(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """Check whether a daemon is answering on the socket."""
+    reply = request("ping", socket_path=socket_path, timeout=0.5)
+    return bool(reply and reply.get("ok"))
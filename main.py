@@ -2,24 +2,42 @@
 """
 Auto Saver - Game Save File Monitor and Backup Daemon (CLI)
 
-Monitors for Silksong game process and automatically backs up save files
-every 60 seconds while the game is running. Maintains up to 100 timestamped
-backups using FIFO (First In, First Out) deletion.
+Monitors for a game process (Silksong by default) and automatically backs up
+save files while the game is running. The check interval adapts between
+configurable bounds: fast right after changes, backing off while the game is
+not running. Maintains up to 100 timestamped backups using FIFO (First In,
+First Out) deletion.
+
+`main.py run` (the default) starts the headless daemon. The other commands
+are thin clients that query or control a running daemon over its Unix socket
+and import nothing beyond the IPC helper.
 """
 
+import argparse
 import signal
 import sys
-import threading
-from monitor_core import AutoSaveMonitor
+from datetime import datetime
+
+import ipc
 
 
 class CLIMonitor:
-    """CLI wrapper for AutoSaveMonitor with signal handling."""
+    """CLI wrapper for AutoSaveDaemon with signal handling."""
     
-    def __init__(self):
-        self.monitor = AutoSaveMonitor()
+    def __init__(self, socket_path=ipc.DEFAULT_SOCKET_PATH, **settings):
+        # Deferred so client commands never pay for the monitoring stack
+        from daemon import AutoSaveDaemon
+        
+        self.daemon = AutoSaveDaemon(socket_path=socket_path, log_callback=self.log_message,
+                                     **settings)
+        self.monitor = self.daemon.monitor
         self.setup_signal_handlers()
     
+    def log_message(self, message):
+        """Print a timestamped log line."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {message}")
+    
     def setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown."""
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -28,8 +46,7 @@ class CLIMonitor:
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully."""
         print(f"\nReceived signal {signum}. Shutting down gracefully...")
-        self.monitor.stop()
-        sys.exit(0)
+        self.daemon.request_shutdown()
     
     def run(self):
         """Main daemon loop."""
@@ -38,21 +55,121 @@ class CLIMonitor:
         print(f"Monitoring save file: {self.monitor.save_file_path}")
         print(f"Backup directory: {self.monitor.backup_dir.absolute()}")
         print(f"Max backups: {self.monitor.max_backups}")
-        print(f"Check interval: {self.monitor.check_interval}s")
+        print(f"Check interval: {self.monitor.check_interval}s "
+              f"(adaptive {self.monitor.min_check_interval}-{self.monitor.max_check_interval}s)")
+        print(f"Control socket: {self.daemon.socket_path}")
         print("Press Ctrl+C to stop")
         print("-" * 50)
         
         try:
-            self.monitor.start()
-        except KeyboardInterrupt:
-            print("\nKeyboard interrupt received")
+            self.daemon.serve_forever()
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
         finally:
             print("Auto Save Monitor - Shutdown complete")
 
 
+def format_size(size):
+    """Format a byte count for display."""
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def run_client(args):
+    """Send one command to the running daemon and print the reply."""
+    params = {}
+    if args.command == "backups":
+        params["limit"] = args.limit
+    elif args.command == "events":
+        params["since"] = args.since
+    
+    reply = ipc.request(args.command, socket_path=args.socket, **params)
+    if reply is None:
+        print(f"No daemon running on {args.socket}")
+        return 1
+    if not reply.get("ok"):
+        print(f"Error: {reply.get('error')}")
+        return 1
+    
+    if args.command == "status":
+        print(f"Monitoring: {'yes' if reply['monitoring'] else 'no'}")
+        print(f"Game running: {'yes' if reply['game_running'] else 'no'}")
+        print(f"Backups: {reply['backup_count']} / {reply['max_backups']}")
+        print(f"Last backup: {reply['last_backup'] or 'Never'}")
+        print(f"Next check in: {reply['current_interval']:g}s")
+    elif args.command == "backups":
+        for backup in reply["backups"]:
+            print(f"{backup['timestamp']}  {format_size(backup['size'])}")
+    elif args.command == "events":
+        for event in reply["events"]:
+            print(f"[{event['time']}] {event['message']}")
+    else:
+        print("OK")
+    return 0
+
+
+def parse_args(argv=None):
+    """Parse command line arguments; no command means "run"."""
+    parser = argparse.ArgumentParser(description="Game save file monitor and backup daemon")
+    parser.add_argument("--socket", default=ipc.DEFAULT_SOCKET_PATH,
+                        help="Unix socket used to talk to the daemon")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    run_parser = subparsers.add_parser("run", help="Run the headless daemon (default)")
+    run_parser.add_argument("--process-name", help="Game process to monitor")
+    run_parser.add_argument("--save-path", help="Save file or folder to back up")
+    run_parser.add_argument("--backup-dir", help="Where to store backups")
+    run_parser.add_argument("--replica-dir", help="Optional secondary backup folder")
+    run_parser.add_argument("--max-backups", type=int, help="Maximum backup count")
+    run_parser.add_argument("--check-interval", type=int, help="Check interval ceiling during play (s)")
+    run_parser.add_argument("--min-interval", type=int, help="Fastest check interval (s)")
+    run_parser.add_argument("--max-interval", type=int, help="Longest back-off interval (s)")
+    run_parser.add_argument("--pack", action="store_true", default=None,
+                            help="Store folder snapshots as single pack files")
+    
+    subparsers.add_parser("status", help="Show daemon status")
+    backups_parser = subparsers.add_parser("backups", help="List recent backups")
+    backups_parser.add_argument("--limit", type=int, default=10)
+    events_parser = subparsers.add_parser("events", help="Show recent daemon events")
+    events_parser.add_argument("--since", type=int, default=0, help="Only events after this id")
+    subparsers.add_parser("start", help="Resume monitoring in the daemon")
+    subparsers.add_parser("stop", help="Pause monitoring in the daemon")
+    subparsers.add_parser("shutdown", help="Stop the daemon")
+    
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(list(argv or sys.argv[1:]) + ["run"])
+    return args
+
+
 def main():
     """Main function - entry point for the application."""
-    cli_monitor = CLIMonitor()
+    args = parse_args()
+    if args.command != "run":
+        sys.exit(run_client(args))
+    
+    save_path = args.save_path
+    try:
+        cli_monitor = CLIMonitor(
+            socket_path=args.socket,
+            process_name=args.process_name,
+            save_file_path=save_path,
+            save_file_name=save_path and save_path.rstrip("/").split("/")[-1],
+            backup_dir=args.backup_dir,
+            replica_dir=args.replica_dir,
+            max_backups=args.max_backups,
+            check_interval=args.check_interval,
+            min_check_interval=args.min_interval,
+            max_check_interval=args.max_interval,
+            pack_snapshots=args.pack,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     cli_monitor.run()
 
 
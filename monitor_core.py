@@ -5,20 +5,75 @@ Auto Save Monitor Core - Shared Monitoring Logic
 Core monitoring functionality that can be used by both CLI and GUI implementations.
 """
 
+import os
 import subprocess
 import shutil
-import time
+import threading
 import hashlib
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+from replication import BackupReplicator
+from packfile import PACK_SUFFIX, is_pack, write_pack, read_pack_hash
+
+
+class AdaptiveScheduler:
+    """Picks the delay before the next check from game state and save activity.
+
+    - Game not running: back off geometrically toward max_interval.
+    - Game just started or save changed: drop to min_interval.
+    - Quiet play: decay slowly back toward play_interval.
+    """
+    
+    def __init__(self, min_interval=5, max_interval=300, play_interval=60,
+                 play_growth=1.5, idle_growth=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        # Ceiling during play is the classic check interval, kept within bounds
+        self.play_interval = min(max(play_interval, self.min_interval), self.max_interval)
+        self.play_growth = play_growth
+        self.idle_growth = idle_growth
+        self.interval = self.play_interval
+        self.game_was_running = None
+    
+    def reset(self):
+        """Forget the previous game state, so the next running tick counts as a start."""
+        self.interval = self.play_interval
+        self.game_was_running = None
+    
+    def _clamp(self, value, ceiling) -> float:
+        return min(max(value, self.min_interval), ceiling)
+    
+    def next_interval(self, game_running: bool, changed: bool = False) -> Tuple[float, str]:
+        """Return (interval, reason) for the next sleep."""
+        if not game_running:
+            if self.game_was_running is False:
+                self.interval = self._clamp(self.interval * self.idle_growth, self.max_interval)
+            else:
+                self.interval = self.play_interval
+            reason = "game not running"
+        elif not self.game_was_running:
+            self.interval = self.min_interval
+            reason = "game started"
+        elif changed:
+            self.interval = self.min_interval
+            reason = "save changed"
+        else:
+            self.interval = self._clamp(self.interval * self.play_growth, self.play_interval)
+            reason = "no changes"
+        
+        self.game_was_running = game_running
+        return self.interval, reason
 
 
 class AutoSaveMonitor:
     """Main daemon class for monitoring game process and backing up save files."""
     
     def __init__(self, process_name="Silksong", save_file_name="user1.dat", save_file_path=None, 
-                 backup_dir="./backups", max_backups=100, check_interval=60, backup_mode="file"):
+                 backup_dir="./backups", max_backups=100, check_interval=60, backup_mode="file",
+                 min_check_interval=5, max_check_interval=300, adaptive_interval=True,
+                 log_callback=None, replica_dir=None, pack_snapshots=False):
         # Configuration
         self.process_name = process_name
         self.save_file_name = save_file_name
@@ -43,17 +98,101 @@ class AutoSaveMonitor:
             self.source_name = save_file_name
         
         self.backup_dir = Path(backup_dir)
+        # Folder backups can be stored as one pack file per snapshot
+        self.pack_snapshots = pack_snapshots and self.is_folder_backup
         self.max_backups = max_backups
+        # Intervals under a second would make the loop fork pgrep back to back
+        for name, value in (("check_interval", check_interval),
+                            ("min_check_interval", min_check_interval),
+                            ("max_check_interval", max_check_interval)):
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1 second")
         self.check_interval = check_interval
+        self.min_check_interval = min_check_interval
+        self.max_check_interval = max_check_interval
+        self.adaptive_interval = adaptive_interval
+        self.scheduler = AdaptiveScheduler(min_check_interval, max_check_interval, check_interval)
+        self.current_interval = check_interval
+        self.log_callback = log_callback
+        self.last_backup_path = None
+        # Bumped whenever snapshots are added or removed, so callers can cache listings
+        self.backups_version = 0
+        # (snapshot name, hash) of the latest backup, and hash of the source at last check
+        self._latest_backup_hash = None
+        self._source_hash = None
+        
+        # Optional secondary target, filled in the background
+        self.replicator = None
+        if replica_dir:
+            self.replicator = BackupReplicator(self.backup_dir, replica_dir, max_backups=max_backups,
+                                               log_callback=self.log)
+        
         self.running = False
         self.game_detected = False
+        self._stop_event = threading.Event()
+        # PIDs of this process and its launchers, whose command lines may contain process_name
+        self._own_pids = None
+    
+    def log(self, message: str):
+        """Forward a message to the log callback, if any."""
+        if self.log_callback is not None:
+            self.log_callback(message)
+    
+    def start_replication(self):
+        """Start background replication to the secondary target, if configured."""
+        if self.replicator is not None:
+            self.replicator.start()
+    
+    def stop_replication(self):
+        """Ask background replication to stop once queued snapshots are shipped.
+        
+        Does not wait, so it is safe to call from the GUI thread or a request handler.
+        """
+        if self.replicator is not None:
+            self.replicator.stop()
+    
+    def next_check_interval(self, game_running: bool, changed: bool = False) -> float:
+        """Choose the delay before the next check, logging it only when it changes."""
+        if self.adaptive_interval:
+            interval, reason = self.scheduler.next_interval(game_running, changed)
+        else:
+            interval, reason = self.check_interval, "fixed interval"
+        # Logging every tick would crowd game and backup events out of the daemon's history
+        if interval != self.current_interval:
+            self.log(f"Check interval now {interval:g}s ({reason})")
+        self.current_interval = interval
+        return interval
+    
+    def wait(self, interval: float) -> bool:
+        """Sleep for interval seconds; returns True early if stop was requested."""
+        return self._stop_event.wait(interval)
+    
+    def get_own_pids(self) -> set:
+        """Get this process and its ancestors, looked up once with ps."""
+        if self._own_pids is None:
+            pids = {os.getpid()}
+            pid = os.getppid()
+            while pid > 1 and pid not in pids:
+                pids.add(pid)
+                try:
+                    result = subprocess.run(['ps', '-o', 'ppid=', '-p', str(pid)],
+                                            capture_output=True, text=True, timeout=5)
+                    pid = int(result.stdout.strip())
+                except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
+                    break
+            self._own_pids = pids
+        return self._own_pids
     
     def is_game_running(self) -> bool:
         """Check if game process is running using pgrep."""
         try:
             result = subprocess.run(['pgrep', '-f', self.process_name], 
                                   capture_output=True, text=True, timeout=5)
-            return result.returncode == 0 and result.stdout.strip() != ""
+            if result.returncode != 0:
+                return False
+            # pgrep -f also matches our own command line (e.g. main.py run --process-name X)
+            pids = {int(pid) for pid in result.stdout.split() if pid.isdigit()}
+            return bool(pids - self.get_own_pids())
         except (subprocess.TimeoutExpired, FileNotFoundError):
             return False
     
@@ -85,29 +224,50 @@ class AutoSaveMonitor:
         except Exception as e:
             return None
     
+    @staticmethod
+    def get_snapshot_name(snapshot: Path) -> str:
+        """Timestamp name of a snapshot folder or pack file."""
+        return snapshot.stem if snapshot.suffix == PACK_SUFFIX else snapshot.name
+    
+    def list_snapshots(self) -> list:
+        """Get all snapshots (folders and pack files) sorted by timestamp, oldest first."""
+        if not self.backup_dir.exists():
+            return []
+        
+        snapshots = [f for f in self.backup_dir.iterdir()
+                     if not f.name.startswith(".") and (f.is_dir() or is_pack(f))]
+        snapshots.sort(key=self.get_snapshot_name)
+        return snapshots
+    
     def get_latest_backup_hash(self) -> Optional[str]:
         """Get hash of the most recent backup for comparison."""
-        if not self.backup_dir.exists():
+        snapshots = self.list_snapshots()
+        if not snapshots:
             return None
         
-        # Get all backup folders and sort by name (timestamp) - newest first
-        backup_folders = [f for f in self.backup_dir.iterdir() if f.is_dir()]
-        if not backup_folders:
-            return None
+        latest_backup = snapshots[-1]
+        latest_name = self.get_snapshot_name(latest_backup)
         
-        backup_folders.sort(key=lambda x: x.name, reverse=True)
-        latest_backup = backup_folders[0]
+        # Reuse the cached hash while the latest snapshot is unchanged
+        if self._latest_backup_hash and self._latest_backup_hash[0] == latest_name:
+            return self._latest_backup_hash[1]
         
-        if self.is_folder_backup:
-            # For folder backups, hash the entire folder
-            return self.get_folder_hash(latest_backup)
+        latest_hash = None
+        if is_pack(latest_backup):
+            # Pack files record the folder hash in their index
+            latest_hash = read_pack_hash(latest_backup)
+        elif self.is_folder_backup:
+            # For folder backups, hash the copied folder inside the snapshot
+            latest_hash = self.get_folder_hash(latest_backup / self.save_file_path.name)
         else:
             # For file backups, hash the specific file
             latest_backup_file = latest_backup / self.save_file_name
             if latest_backup_file.exists():
-                return self.get_file_hash(latest_backup_file)
+                latest_hash = self.get_file_hash(latest_backup_file)
         
-        return None
+        if latest_hash:
+            self._latest_backup_hash = (latest_name, latest_hash)
+        return latest_hash
     
     def has_save_file_changed(self) -> bool:
         """Check if the current save file/folder is different from the latest backup."""
@@ -122,6 +282,7 @@ class AutoSaveMonitor:
         
         if not current_hash:
             return False
+        self._source_hash = current_hash
         
         # Get hash of latest backup
         latest_backup_hash = self.get_latest_backup_hash()
@@ -147,17 +308,29 @@ class AutoSaveMonitor:
         backup_folder = self.backup_dir / timestamp
         
         try:
-            # Create backup directory
-            backup_folder.mkdir(parents=True, exist_ok=True)
-            
-            if self.is_folder_backup:
-                # Copy entire folder
-                dest_folder = backup_folder / self.save_file_path.name
-                shutil.copytree(self.save_file_path, dest_folder, dirs_exist_ok=True)
+            if self.pack_snapshots:
+                # Write the whole folder as a single pack file
+                self.backup_dir.mkdir(parents=True, exist_ok=True)
+                backup_folder = self.backup_dir / f"{timestamp}{PACK_SUFFIX}"
+                self._source_hash = write_pack(self.save_file_path, backup_folder)
             else:
-                # Copy single file
-                backup_file = backup_folder / self.save_file_name
-                shutil.copy2(self.save_file_path, backup_file)
+                # Create backup directory
+                backup_folder.mkdir(parents=True, exist_ok=True)
+                
+                if self.is_folder_backup:
+                    # Copy entire folder
+                    dest_folder = backup_folder / self.save_file_path.name
+                    shutil.copytree(self.save_file_path, dest_folder, dirs_exist_ok=True)
+                else:
+                    # Copy single file
+                    backup_file = backup_folder / self.save_file_name
+                    shutil.copy2(self.save_file_path, backup_file)
+            
+            self.last_backup_path = backup_folder
+            self._latest_backup_hash = (timestamp, self._source_hash)
+            self.backups_version += 1
+            if self.replicator is not None:
+                self.replicator.enqueue(backup_folder)
             
             return True
             
@@ -166,38 +339,40 @@ class AutoSaveMonitor:
     
     def manage_fifo_backups(self):
         """Maintain maximum number of backups using FIFO deletion."""
-        if not self.backup_dir.exists():
-            return
-        
-        # Get all backup folders and sort by name (timestamp)
-        backup_folders = [f for f in self.backup_dir.iterdir() if f.is_dir()]
-        backup_folders.sort(key=lambda x: x.name)
+        # Get all snapshots sorted by name (timestamp)
+        backup_folders = self.list_snapshots()
         
         # Remove oldest backups if we exceed the limit
         while len(backup_folders) > self.max_backups:
             oldest_folder = backup_folders.pop(0)
             try:
-                shutil.rmtree(oldest_folder)
+                if oldest_folder.is_dir():
+                    shutil.rmtree(oldest_folder)
+                else:
+                    oldest_folder.unlink()
+                self.backups_version += 1
             except Exception:
                 pass
     
     def get_backup_count(self) -> int:
         """Get the current number of backups."""
-        if not self.backup_dir.exists():
-            return 0
-        return len([f for f in self.backup_dir.iterdir() if f.is_dir()])
+        return len(self.list_snapshots())
     
     def get_recent_backups(self, limit=10) -> list:
         """Get list of recent backups sorted by timestamp (newest first)."""
-        if not self.backup_dir.exists():
-            return []
-        
-        backup_folders = [f for f in self.backup_dir.iterdir() if f.is_dir()]
-        backup_folders.sort(key=lambda x: x.name, reverse=True)
+        backup_folders = self.list_snapshots()
+        backup_folders.reverse()
         
         backups = []
         for folder in backup_folders[:limit]:
-            if self.is_folder_backup:
+            if is_pack(folder):
+                # Pack files hold the whole folder, so one stat is enough
+                backups.append({
+                    'timestamp': self.get_snapshot_name(folder),
+                    'path': folder,
+                    'size': folder.stat().st_size
+                })
+            elif self.is_folder_backup:
                 # For folder backups, get the size of the entire folder
                 total_size = sum(f.stat().st_size for f in folder.rglob('*') if f.is_file())
                 backups.append({
@@ -221,35 +396,45 @@ class AutoSaveMonitor:
     def stop(self):
         """Stop the monitoring loop."""
         self.running = False
+        self._stop_event.set()
+        self.stop_replication()
     
     def start(self):
         """Start the monitoring loop (blocks until stop is called)."""
         self.running = True
+        self._stop_event.clear()
+        # A restart while the game runs should still get the fast "game started" tick
+        self.scheduler.reset()
+        self.start_replication()
         game_was_running = False
         
         while self.running:
             try:
                 is_running = self.is_game_running()
+                backup_result = False
                 
                 if is_running:
                     if not game_was_running:
                         game_was_running = True
+                        self.log(f"Game started: {self.process_name}")
                     
                     # Create backup while game is running
                     backup_result = self.create_backup()
                     if backup_result:
                         self.manage_fifo_backups()
+                        self.log(f"Backup created: {self.last_backup_path.name}")
                 
                 elif game_was_running:
                     game_was_running = False
+                    self.log(f"Game stopped: {self.process_name}")
                 
                 self.game_detected = game_was_running
                 
-                # Sleep for the check interval
-                time.sleep(self.check_interval)
+                # Sleep for the adaptive interval (wakes early on stop)
+                self.wait(self.next_check_interval(is_running, backup_result))
                 
             except Exception as e:
                 # Continue running despite errors
-                time.sleep(self.check_interval)
+                self.wait(self.check_interval)
         
         self.running = False
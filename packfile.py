@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Auto Save Pack Files - Single-File Folder Snapshots
+
+Stores a whole save folder as one append-only pack file, so each snapshot
+costs one inode instead of one per save file.
+
+Layout:
+    MAGIC | file data ... | JSON index | index offset (u64) | index length (u64) | MAGIC
+
+The index lists every file with its offset, size and MD5, plus the hash of the
+whole folder (same scheme as AutoSaveMonitor.get_folder_hash). Readers mmap the
+pack and slice file contents straight out of it.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+
+MAGIC = b"ASPACK01"
+PACK_SUFFIX = ".pack"
+TRAILER = struct.Struct("<QQ")
+
+
+def is_pack(path: Path) -> bool:
+    """Check whether a snapshot path is a pack file."""
+    return path.suffix == PACK_SUFFIX and path.is_file()
+
+
+def write_pack(source_folder: Path, pack_path: Path) -> str:
+    """Write source_folder into a new pack file; returns the folder hash.
+    
+    The pack is written under a temporary dot-name and renamed into place, so
+    a partially written pack is never mistaken for a snapshot.
+    """
+    source_folder = Path(source_folder)
+    pack_path = Path(pack_path)
+    tmp_path = pack_path.with_name(f".tmp-{pack_path.name}")
+    
+    folder_md5 = hashlib.md5()
+    entries = []
+    dirs = []
+    try:
+        with open(tmp_path, "wb") as pack:
+            pack.write(MAGIC)
+            for file_path in sorted(source_folder.rglob("*")):
+                rel_path = file_path.relative_to(source_folder)
+                if file_path.is_dir():
+                    dirs.append(rel_path.as_posix())
+                    continue
+                if not file_path.is_file():
+                    continue
+                
+                folder_md5.update(str(rel_path).encode())
+                file_md5 = hashlib.md5()
+                offset = pack.tell()
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        folder_md5.update(chunk)
+                        file_md5.update(chunk)
+                        pack.write(chunk)
+                
+                stat = file_path.stat()
+                entries.append([rel_path.as_posix(), offset, pack.tell() - offset,
+                                file_md5.hexdigest(), stat.st_mtime, stat.st_mode & 0o777])
+            
+            index = {
+                "version": 1,
+                "root": source_folder.name,
+                "hash": folder_md5.hexdigest(),
+                "dirs": dirs,
+                "entries": entries,
+            }
+            index_data = json.dumps(index).encode()
+            index_offset = pack.tell()
+            pack.write(index_data)
+            pack.write(TRAILER.pack(index_offset, len(index_data)))
+            pack.write(MAGIC)
+            pack.flush()
+            os.fsync(pack.fileno())
+        
+        os.replace(tmp_path, pack_path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    return index["hash"]
+
+
+class PackReader:
+    """Random-access reader for a pack file, backed by mmap."""
+    
+    def __init__(self, pack_path):
+        self.pack_path = Path(pack_path)
+        self._file = open(self.pack_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index = self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+        self.entries = {e[0]: e for e in self.index["entries"]}
+    
+    def _read_index(self) -> dict:
+        trailer_size = TRAILER.size + len(MAGIC)
+        if (len(self._map) < len(MAGIC) + trailer_size
+                or self._map[:len(MAGIC)] != MAGIC or self._map[-len(MAGIC):] != MAGIC):
+            raise ValueError(f"Not a pack file: {self.pack_path}")
+        index_offset, index_length = TRAILER.unpack(
+            self._map[-trailer_size:-len(MAGIC)])
+        return json.loads(self._map[index_offset:index_offset + index_length].decode())
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+    
+    @property
+    def root(self) -> str:
+        return self.index["root"]
+    
+    @property
+    def folder_hash(self) -> str:
+        return self.index["hash"]
+    
+    @property
+    def total_size(self) -> int:
+        """Size of the packed files, excluding pack overhead."""
+        return sum(e[2] for e in self.index["entries"])
+    
+    def names(self) -> list:
+        return [e[0] for e in self.index["entries"]]
+    
+    def read(self, name: str) -> bytes:
+        """Return one file's contents, sliced straight out of the mapping."""
+        _, offset, size = self.entries[name][:3]
+        return self._map[offset:offset + size]
+    
+    def verify(self) -> bool:
+        """Check every file and the folder hash against the index."""
+        folder_md5 = hashlib.md5()
+        for name, offset, size, file_hash, _, _ in self.index["entries"]:
+            data = self._map[offset:offset + size]
+            folder_md5.update(str(Path(name)).encode())
+            folder_md5.update(data)
+            if hashlib.md5(data).hexdigest() != file_hash:
+                return False
+        return folder_md5.hexdigest() == self.folder_hash
+    
+    @staticmethod
+    def _safe_path(dest_folder: Path, name: str) -> Path:
+        """Join an index name to dest_folder, rejecting anything that could escape it."""
+        rel_path = Path(name)
+        if not name or rel_path.is_absolute() or ".." in rel_path.parts:
+            raise ValueError(f"Unsafe path in pack index: {name!r}")
+        return dest_folder / rel_path
+    
+    def extract(self, dest_folder: Path):
+        """Restore the packed folder into dest_folder.
+        
+        Raises ValueError before writing anything if the index holds absolute
+        or '..' paths (a corrupted or tampered pack).
+        """
+        dest_folder = Path(dest_folder)
+        dirs = [self._safe_path(dest_folder, name) for name in self.index["dirs"]]
+        files = [(self._safe_path(dest_folder, e[0]),) + tuple(e[1:])
+                 for e in self.index["entries"]]
+        
+        dest_folder.mkdir(parents=True, exist_ok=True)
+        for path in dirs:
+            path.mkdir(parents=True, exist_ok=True)
+        for dest, offset, size, _, mtime, mode in files:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with open(dest, "wb") as f:
+                f.write(self._map[offset:offset + size])
+            os.chmod(dest, mode & 0o777)
+            os.utime(dest, (mtime, mtime))
+
+
+def read_pack_hash(pack_path: Path) -> Optional[str]:
+    """Folder hash recorded in a pack's index, or None if unreadable."""
+    try:
+        with PackReader(pack_path) as reader:
+            return reader.folder_hash
+    except (OSError, ValueError):
+        return None
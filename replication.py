@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Auto Save Replication - Background Mirroring of Snapshots
+
+Ships completed snapshots (folders or pack files) from the backup directory to
+a secondary directory target (second disk, NAS mount) without blocking the
+monitoring loop. Files in snapshot folders that the target already has are
+hard-linked there; pack files are copied whole.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from packfile import is_pack
+
+
+class BackupReplicator:
+    """Background worker that mirrors snapshot folders to a secondary target."""
+
+    INDEX_FILE = ".replication_index.json"
+    TMP_PREFIX = ".tmp-"
+
+    def __init__(self, source_dir, target_dir, max_backups=100, batch_size=10,
+                 batch_delay=5, retry_delay=60, log_callback=None):
+        self.source_dir = Path(source_dir)
+        self.target_dir = Path(target_dir)
+        self.max_backups = max_backups
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        # Seconds to wait before retrying an unreachable target
+        self.retry_delay = retry_delay
+        self.log_callback = log_callback
+
+        # Hash -> path (relative to target_dir) of a file the target already has
+        self.index = {}
+        self.queue = queue.Queue()
+        # True from start() until the worker thread has actually exited
+        self.running = False
+        self.stopping = False
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def log(self, message: str):
+        """Forward a message to the log callback, if any."""
+        if self.log_callback is not None:
+            self.log_callback(message)
+
+    @staticmethod
+    def get_file_hash(file_path: Path) -> Optional[str]:
+        """Calculate MD5 hash of a file for comparison."""
+        try:
+            hash_md5 = hashlib.md5()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    hash_md5.update(chunk)
+            return hash_md5.hexdigest()
+        except Exception:
+            return None
+
+    def _snapshot_folders(self, directory: Path) -> list:
+        """Snapshot folders and pack files sorted by name (timestamp), oldest first."""
+        if not directory.exists():
+            return []
+        folders = [f for f in directory.iterdir()
+                   if not f.name.startswith(".") and (f.is_dir() or is_pack(f))]
+        folders.sort(key=lambda x: x.name)
+        return folders
+
+    def load_index(self):
+        """Load the target hash index, rebuilding it by scanning if missing or corrupt."""
+        index_path = self.target_dir / self.INDEX_FILE
+        try:
+            with open(index_path, "r") as f:
+                self.index = json.load(f)
+            return
+        except (OSError, ValueError):
+            pass
+
+        self.index = {}
+        for folder in self._snapshot_folders(self.target_dir):
+            if is_pack(folder):
+                # Packs are copied whole, so nothing links into them
+                continue
+            for file_path in folder.rglob("*"):
+                if file_path.is_file():
+                    file_hash = self.get_file_hash(file_path)
+                    if file_hash:
+                        self.index[file_hash] = str(file_path.relative_to(self.target_dir))
+        self.save_index()
+
+    def save_index(self):
+        """Persist the target hash index atomically."""
+        index_path = self.target_dir / self.INDEX_FILE
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            self.log(f"Replication: failed to save index: {e}")
+
+    def pending_snapshots(self) -> list:
+        """Snapshots in the retention window that the target does not have yet."""
+        replicated = {f.name for f in self._snapshot_folders(self.target_dir)}
+        window = self._snapshot_folders(self.source_dir)[-self.max_backups:]
+        return [f for f in window if f.name not in replicated]
+
+    def enqueue(self, snapshot_path):
+        """Queue a completed snapshot folder for replication."""
+        self.queue.put(Path(snapshot_path))
+
+    def _copy_file(self, src: Path, dest: Path):
+        """Copy a file, reusing an identical file already on the target if possible."""
+        file_hash = self.get_file_hash(src)
+        existing = self.index.get(file_hash) if file_hash else None
+        existing_path = self.target_dir / existing if existing else None
+
+        if existing_path is not None and existing_path.is_file():
+            try:
+                os.link(existing_path, dest)
+            except OSError:
+                # Hard links unsupported (e.g. some NAS mounts); copy on target
+                shutil.copy2(existing_path, dest)
+        else:
+            shutil.copy2(src, dest)
+
+        # Point at the newest copy so the entry outlives FIFO deletion longest
+        if file_hash:
+            self.index[file_hash] = str(dest.relative_to(self.target_dir))
+
+    def replicate_snapshot(self, snapshot: Path) -> bool:
+        """Copy one snapshot folder to the target; it appears there only once complete."""
+        final_folder = self.target_dir / snapshot.name
+        if final_folder.exists():
+            return False
+        if not snapshot.exists():
+            # Already rotated out of the source by FIFO retention
+            return False
+
+        tmp_folder = self.target_dir / f"{self.TMP_PREFIX}{snapshot.name}"
+        try:
+            if tmp_folder.is_dir():
+                shutil.rmtree(tmp_folder)
+            elif tmp_folder.exists():
+                tmp_folder.unlink()
+
+            if is_pack(snapshot):
+                # A pack file is the whole snapshot; it is shipped as is
+                shutil.copy2(snapshot, tmp_folder)
+            else:
+                tmp_folder.mkdir(parents=True)
+                for src in sorted(snapshot.rglob("*")):
+                    dest = tmp_folder / src.relative_to(snapshot)
+                    if src.is_dir():
+                        dest.mkdir(parents=True, exist_ok=True)
+                    elif src.is_file():
+                        dest.parent.mkdir(parents=True, exist_ok=True)
+                        self._copy_file(src, dest)
+
+            os.rename(tmp_folder, final_folder)
+        except Exception as e:
+            self._remove(tmp_folder)
+            self._rename_index_entries(tmp_folder.name, None)
+            self.log(f"Replication: failed to copy {snapshot.name}: {e}")
+            if isinstance(e, OSError):
+                # Target trouble (unmounted, full, read-only): let the worker retry later
+                raise
+            return False
+
+        # Index entries were recorded under the temporary folder name
+        self._rename_index_entries(tmp_folder.name, final_folder.name)
+        return True
+
+    def _rename_index_entries(self, old_name: str, new_name: Optional[str]):
+        """Move index entries under snapshot old_name to new_name, or drop them if None."""
+        for file_hash, rel_path in list(self.index.items()):
+            parts = Path(rel_path).parts
+            if parts[0] == old_name:
+                if new_name is None:
+                    del self.index[file_hash]
+                else:
+                    self.index[file_hash] = str(Path(new_name, *parts[1:]))
+
+    def manage_fifo_backups(self):
+        """Maintain maximum number of replicated backups using FIFO deletion."""
+        folders = self._snapshot_folders(self.target_dir)
+        removed = set()
+        while len(folders) > self.max_backups:
+            oldest_folder = folders.pop(0)
+            try:
+                if oldest_folder.is_dir():
+                    shutil.rmtree(oldest_folder)
+                else:
+                    oldest_folder.unlink()
+                removed.add(oldest_folder.name)
+            except Exception:
+                pass
+
+        if removed:
+            self.index = {h: p for h, p in self.index.items()
+                          if Path(p).parts[0] not in removed}
+
+    @staticmethod
+    def _remove(path: Path):
+        """Best-effort removal of a file or folder."""
+        try:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.exists():
+                path.unlink()
+        except OSError:
+            pass
+
+    def process_batch(self, batch: list) -> int:
+        """Replicate a batch of snapshots, then apply retention and save the index once."""
+        copied = 0
+        for snapshot in sorted(set(batch), key=lambda x: x.name):
+            if self.replicate_snapshot(snapshot):
+                copied += 1
+
+        self.manage_fifo_backups()
+        self.save_index()
+        if copied:
+            self.log(f"Replication: copied {copied} snapshot(s) to {self.target_dir}")
+        return copied
+
+    def prepare_target(self) -> list:
+        """Get the target ready and return the snapshots it still needs."""
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+
+        # Drop partial copies left behind by an interrupted run
+        for leftover in self.target_dir.glob(f"{self.TMP_PREFIX}*"):
+            self._remove(leftover)
+
+        self.load_index()
+        pending = self.pending_snapshots()
+        if pending:
+            self.log(f"Replication: resuming {len(pending)} pending snapshot(s)")
+        return pending
+
+    def _wait_for_retry(self, work_queue) -> bool:
+        """Sleep retry_delay; returns False if stop was requested meanwhile.
+
+        Snapshots queued while waiting are dropped: prepare_target rescans for
+        everything the target is missing once it is reachable again.
+        """
+        try:
+            while work_queue.get(timeout=self.retry_delay) is not None:
+                pass
+            return False
+        except queue.Empty:
+            return True
+
+    def _worker(self, work_queue, previous=None):
+        """Thread body: wait out the previous worker, then run until stopped."""
+        try:
+            if previous is not None:
+                # A stopped worker may still be finishing its last batch
+                previous.join()
+            self._run(work_queue)
+        finally:
+            with self._lock:
+                if self.thread is threading.current_thread():
+                    self.running = False
+                    self.stopping = False
+
+    def _run(self, work_queue):
+        """Prepare the target, then drain work_queue in batches until its stop sentinel."""
+        ready = False
+        while True:
+            if not ready:
+                # All target I/O happens here, so a missing or slow target
+                # never blocks or breaks the primary backup loop
+                try:
+                    pending = self.prepare_target()
+                    for i in range(0, len(pending), self.batch_size):
+                        self.process_batch(pending[i:i + self.batch_size])
+                    ready = True
+                except OSError as e:
+                    self.log(f"Replication: target {self.target_dir} unavailable ({e}), "
+                             f"retrying in {self.retry_delay}s")
+                    if not self._wait_for_retry(work_queue):
+                        break
+                continue
+
+            try:
+                first = work_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if first is None:
+                break
+
+            batch = [first]
+            stop_after = False
+            # Give closely spaced snapshots a chance to join the same batch
+            while len(batch) < self.batch_size:
+                try:
+                    item = work_queue.get(timeout=self.batch_delay)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop_after = True
+                    break
+                batch.append(item)
+
+            try:
+                self.process_batch(batch)
+            except OSError as e:
+                self.log(f"Replication: batch failed ({e}), will resync")
+                ready = False
+            if stop_after:
+                break
+
+    def start(self):
+        """Start the background worker; it resumes any snapshots not yet replicated."""
+        with self._lock:
+            if self.running and not self.stopping:
+                return
+            # Fresh queue, so a stop sentinel meant for an earlier worker is never
+            # picked up by this one; snapshots left in the old queue are found
+            # again by the resume scan
+            self.queue = queue.Queue()
+            previous = self.thread
+            self.thread = threading.Thread(target=self._worker, args=(self.queue, previous),
+                                           daemon=True)
+            self.running = True
+            self.stopping = False
+            self.thread.start()
+
+    def stop(self):
+        """Ask the worker to stop once queued work is done; returns without waiting."""
+        with self._lock:
+            if not self.running or self.stopping:
+                return
+            self.stopping = True
+            self.queue.put(None)
+
+    def join(self, timeout=None):
+        """Wait for a stopped worker to finish; returns True if it has exited."""
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.running
@@ -0,0 +1,42 @@
+"""Tests for the adaptive check-interval scheduler."""
+
+import pytest
+
+from monitor_core import AdaptiveScheduler, AutoSaveMonitor
+
+
+def test_idle_backs_off_to_max():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=300, play_interval=60)
+    intervals = [scheduler.next_interval(False)[0] for _ in range(6)]
+    assert intervals == [60, 120, 240, 300, 300, 300]
+
+
+def test_game_start_and_save_change_drop_to_min():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=300, play_interval=60)
+    scheduler.next_interval(False)
+    assert scheduler.next_interval(True) == (5, "game started")
+    scheduler.next_interval(True)
+    assert scheduler.next_interval(True, changed=True) == (5, "save changed")
+
+
+def test_quiet_play_decays_back_to_play_interval():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=300, play_interval=60)
+    scheduler.next_interval(True)
+    intervals = [scheduler.next_interval(True)[0] for _ in range(8)]
+    assert intervals == sorted(intervals)
+    assert intervals[0] == 7.5
+    assert intervals[-1] == 60
+
+
+def test_reset_makes_next_running_tick_a_game_start():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=300, play_interval=60)
+    for _ in range(5):
+        scheduler.next_interval(True)
+    scheduler.reset()
+    assert scheduler.next_interval(True) == (5, "game started")
+
+
+@pytest.mark.parametrize("setting", ["check_interval", "min_check_interval", "max_check_interval"])
+def test_monitor_rejects_intervals_under_one_second(setting):
+    with pytest.raises(ValueError):
+        AutoSaveMonitor(**{setting: 0})
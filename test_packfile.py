@@ -0,0 +1,88 @@
+"""Round-trip tests for the pack-file snapshot format."""
+
+import os
+
+import pytest
+
+from monitor_core import AutoSaveMonitor
+from packfile import PackReader, read_pack_hash, write_pack
+
+
+@pytest.fixture
+def save_folder(tmp_path):
+    folder = tmp_path / "save"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "empty").mkdir()
+    for i in range(20):
+        (folder / "sub" / f"slot{i}.dat").write_bytes(os.urandom(64 + i))
+    (folder / "settings.json").write_text('{"volume": 7}')
+    (folder / "blank.dat").write_bytes(b"")
+    return folder
+
+
+def read_tree(folder):
+    return {str(p.relative_to(folder)): p.read_bytes()
+            for p in sorted(folder.rglob("*")) if p.is_file()}
+
+
+def test_round_trip(save_folder, tmp_path):
+    pack_path = tmp_path / "2025-01-01_00-00-00.pack"
+    folder_hash = write_pack(save_folder, pack_path)
+
+    # Same hash scheme as the monitor, so change detection works against packs
+    assert folder_hash == AutoSaveMonitor().get_folder_hash(save_folder)
+    assert read_pack_hash(pack_path) == folder_hash
+    assert not list(tmp_path.glob(".tmp-*"))
+
+    with PackReader(pack_path) as reader:
+        assert reader.root == "save"
+        assert reader.verify()
+        assert reader.read("settings.json") == b'{"volume": 7}'
+        assert reader.read("blank.dat") == b""
+        assert reader.total_size == sum(len(d) for d in read_tree(save_folder).values())
+        data = reader.read("sub/slot3.dat")
+        restore = tmp_path / "restore" / reader.root
+        reader.extract(restore)
+
+    # Data read before close stays usable after the mapping is gone
+    assert data == (save_folder / "sub" / "slot3.dat").read_bytes()
+    assert read_tree(restore) == read_tree(save_folder)
+    assert (restore / "empty").is_dir()
+
+
+def test_verify_detects_corruption(save_folder, tmp_path):
+    pack_path = tmp_path / "snap.pack"
+    write_pack(save_folder, pack_path)
+
+    with PackReader(pack_path) as reader:
+        _, offset, _ = reader.entries["settings.json"][:3]
+    with open(pack_path, "r+b") as f:
+        f.seek(offset)
+        f.write(b"X")
+
+    with PackReader(pack_path) as reader:
+        assert not reader.verify()
+
+
+def test_rejects_non_pack(tmp_path):
+    bogus = tmp_path / "bogus.pack"
+    bogus.write_bytes(b"not a pack file at all, just some bytes")
+    with pytest.raises(ValueError):
+        PackReader(bogus)
+    assert read_pack_hash(bogus) is None
+
+
+@pytest.mark.parametrize("bad_name", ["../escaped.dat", "/tmp/escaped.dat", "sub/../../x"])
+def test_extract_rejects_escaping_paths(save_folder, tmp_path, bad_name):
+    pack_path = tmp_path / "snap.pack"
+    write_pack(save_folder, pack_path)
+
+    with PackReader(pack_path) as reader:
+        reader.index["entries"][0][0] = bad_name
+        restore = tmp_path / "restore"
+        with pytest.raises(ValueError):
+            reader.extract(restore)
+
+    # Nothing is written, inside or outside the restore folder
+    assert not restore.exists()
+    assert not (tmp_path / "escaped.dat").exists()
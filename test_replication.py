@@ -0,0 +1,122 @@
+"""Tests for background replication of snapshots to a secondary target."""
+
+import os
+
+from packfile import PackReader, write_pack
+from replication import BackupReplicator
+
+
+def test_pack_replication_copies_whole_packs(tmp_path):
+    save = tmp_path / "save"
+    save.mkdir()
+    for i in range(10):
+        (save / f"slot{i}.dat").write_bytes(os.urandom(4096))
+    backups = tmp_path / "backups"
+    backups.mkdir()
+    replica = tmp_path / "replica"
+
+    write_pack(save, backups / "2025-01-01_00-00-00.pack")
+    (save / "slot0.dat").write_bytes(os.urandom(4096))
+    write_pack(save, backups / "2025-01-01_00-01-00.pack")
+
+    replicator = BackupReplicator(backups, replica, max_backups=10)
+    replicator.prepare_target()
+    for snapshot in sorted(backups.iterdir()):
+        assert replicator.replicate_snapshot(snapshot)
+        # Packs arrive byte-identical and readable on the target
+        assert (replica / snapshot.name).read_bytes() == snapshot.read_bytes()
+        with PackReader(replica / snapshot.name) as reader:
+            assert reader.verify()
+
+    # Nothing links into packs, so they never appear in the hash index
+    assert replicator.index == {}
+    assert not list(replica.glob(".tmp-*"))
+
+
+def make_snapshot(backups, name, files):
+    folder = backups / name / "save"
+    folder.mkdir(parents=True)
+    for file_name, data in files.items():
+        (folder / file_name).write_bytes(data)
+    return backups / name
+
+
+def test_stop_does_not_block_and_restart_keeps_replicating(tmp_path):
+    backups = tmp_path / "backups"
+    replica = tmp_path / "replica"
+    make_snapshot(backups, "2025-01-01_00-00-00", {"user1.dat": b"one"})
+
+    replicator = BackupReplicator(backups, replica, batch_delay=0)
+    replicator.start()
+    replicator.stop()
+    # Restarting right away must not hand the old stop sentinel to the new worker
+    replicator.start()
+    replicator.enqueue(make_snapshot(backups, "2025-01-01_00-01-00", {"user1.dat": b"two"}))
+    replicator.stop()
+    assert replicator.join(timeout=10)
+
+    assert sorted(p.name for p in replica.iterdir() if not p.name.startswith(".")) == [
+        "2025-01-01_00-00-00", "2025-01-01_00-01-00"]
+
+
+def test_prepare_target_resumes_pending_and_clears_leftovers(tmp_path):
+    backups = tmp_path / "backups"
+    replica = tmp_path / "replica"
+    names = ["2025-01-01_00-00-00", "2025-01-01_00-01-00", "2025-01-01_00-02-00"]
+    for i, name in enumerate(names):
+        make_snapshot(backups, name, {"user1.dat": bytes([i])})
+
+    # A previous run replicated the first snapshot and died halfway through the second
+    replicator = BackupReplicator(backups, replica)
+    replicator.prepare_target()
+    assert replicator.process_batch([backups / names[0]]) == 1
+    leftover = replica / f".tmp-{names[1]}" / "save"
+    leftover.mkdir(parents=True)
+    (leftover / "user1.dat").write_bytes(b"partial")
+
+    restarted = BackupReplicator(backups, replica)
+    pending = restarted.prepare_target()
+    assert [p.name for p in pending] == names[1:]
+    assert not list(replica.glob(".tmp-*"))
+    assert restarted.index == replicator.index
+
+
+def test_target_keeps_max_backups_and_prunes_index(tmp_path):
+    backups = tmp_path / "backups"
+    replica = tmp_path / "replica"
+    names = ["2025-01-01_00-00-00", "2025-01-01_00-01-00", "2025-01-01_00-02-00"]
+    snapshots = [make_snapshot(backups, name, {f"slot{i}.dat": b"x" * (i + 1)})
+                 for i, name in enumerate(names)]
+
+    replicator = BackupReplicator(backups, replica, max_backups=2)
+    replicator.prepare_target()
+    assert replicator.process_batch(snapshots) == 3
+
+    # Oldest snapshot is rotated out, like the primary FIFO retention
+    assert sorted(p.name for p in replica.iterdir() if not p.name.startswith(".")) == names[1:]
+    assert all(not path.startswith(names[0]) for path in replicator.index.values())
+    assert len(replicator.index) == 2
+
+    # The saved index matches, so a restart does not link to deleted files
+    restarted = BackupReplicator(backups, replica, max_backups=2)
+    restarted.load_index()
+    assert restarted.index == replicator.index
+
+
+def test_unchanged_files_are_hard_linked_on_target(tmp_path):
+    backups = tmp_path / "backups"
+    replica = tmp_path / "replica"
+    first = make_snapshot(backups, "2025-01-01_00-00-00",
+                          {"settings.dat": b"same", "user1.dat": b"old"})
+    second = make_snapshot(backups, "2025-01-01_00-01-00",
+                           {"settings.dat": b"same", "user1.dat": b"new"})
+
+    replicator = BackupReplicator(backups, replica)
+    replicator.prepare_target()
+    replicator.process_batch([first, second])
+
+    old_dir = replica / first.name / "save"
+    new_dir = replica / second.name / "save"
+    assert (new_dir / "settings.dat").stat().st_ino == (old_dir / "settings.dat").stat().st_ino
+    assert (new_dir / "user1.dat").stat().st_ino != (old_dir / "user1.dat").stat().st_ino
+    assert (new_dir / "user1.dat").read_bytes() == b"new"